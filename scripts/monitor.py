@@ -5,20 +5,37 @@ Sends Telegram alerts when thresholds are breached.
 """
 
 import asyncio
+import contextlib
 import json
 import os
 import time
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+import numpy as np
+import orjson
+import websockets
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Configuration
 API_URL = os.getenv("HYPERLIQUID_API_URL", "https://api.hyperliquid.xyz")
+WS_URL = os.getenv("HYPERLIQUID_WS_URL", API_URL.replace("https://", "wss://", 1) + "/ws")
+# webData2 is keyed by user but carries meta + assetCtxs for every perp; any address works
+WS_USER = os.getenv("HYPERLIQUID_WS_USER", "0x0000000000000000000000000000000000000000")
 ALERT_CHANNEL = os.getenv("ALERT_CHANNEL", "")
+TELEGRAM_API_URL = "https://api.telegram.org"
+TG_BOT_TOKEN = os.getenv("TG_BOT_TOKEN", "")
+TG_CHAT_ID = os.getenv("TG_CHAT_ID", "")
+OPENCLAW_TIMEOUT = 10  # seconds per `openclaw message send` fallback call
+TELEGRAM_MAX_CHARS = 3900  # below the 4096 sendMessage limit, leaves room for the header
+ALERT_SUMMARY_MIN = 20  # prepend per-category counts above this many alerts
+ALERT_QUEUE_SIZE = 1024  # pending alerts kept before the oldest are dropped
+LIQ_SEEN_SIZE = 4096  # recently alerted liquidations remembered for de-duplication
 
 # Thresholds
 OI_SPIKE_THRESHOLD = float(os.getenv("OI_SPIKE_THRESHOLD", 10))  # %
@@ -28,102 +45,259 @@ LIQUIDATION_THRESHOLD = float(os.getenv("LIQUIDATION_THRESHOLD", 50000))  # $
 VOLUME_SPIKE_THRESHOLD = float(os.getenv("VOLUME_SPIKE_THRESHOLD", 200))  # %
 VOLATILITY_SPIKE_THRESHOLD = float(os.getenv("VOLATILITY_SPIKE_THRESHOLD", 3))  # %
 
-POLL_INTERVAL = 60  # seconds
+POLL_INTERVAL = 60  # seconds, comparison window for OI/funding/price changes
+WS_PING_INTERVAL = 30  # seconds, server drops connections idle for 60s
+WS_RECONNECT_DELAY = 5  # seconds
+CONCURRENCY_LIMIT = 8  # in-flight /info requests
+MAX_COINS = 1024  # per-coin array slots, indexed by Hyperliquid asset index
+STATE_FILE = os.getenv("STATE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "state.bin"))
+STATE_MAX_AGE = 2 * POLL_INTERVAL  # seconds; older baselines no longer describe "1min"
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# One market record per coin; oiUsd and vlm are USD notionals
+_REC_DT = np.dtype([
+    ("oi", "f8"), ("oiUsd", "f8"), ("fund", "f8"), ("px", "f8"), ("vlm", "f8"), ("prev", "f8"),
+])
+
+# Alert formatters, bound once and only called for coins that crossed a threshold
+_OI_TMPL = "{dir} OI SPIKE: {coin} OI changed {pct:.1f}% (now: {oi:,.0f})".format
+_FUNDING_TMPL = "📊 FUNDING SPIKE: {coin} funding {dir} {pct:.1f}% (now: {funding:.6f})".format
+_VOLATILITY_TMPL = "📈 VOLATILITY: {coin} {dir} {pct:.2f}% in 1min (now: ${px:,.2f})".format
+_LIQUIDATION_TMPL = "💥 LIQUIDATION: {coin} ${usd:,.0f} @ ${px:,.2f}".format
+_WHALE_TMPL = "🐋 WHALE: {dir} {coin} ${usd:,.0f} (entry: {entry})".format
+
+
+@lru_cache(maxsize=MAX_COINS)
+def _funding_history_body(coin: str, horizon: int) -> bytes:
+    """Serialized fundingHistory request body, cached per (coin, horizon)."""
+    return orjson.dumps({"type": "fundingHistory", "coin": coin, "horizon": horizon})
+
+
+def _scan(current: np.ndarray, last: np.ndarray, threshold: float,
+          out: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Write percent change vs last into out and return indices at or over threshold.
+
+    Change is 0 where last is 0 and NaN where there is no baseline yet.
+    """
+    out.fill(0.0)
+    np.divide(current - last, np.abs(last), out=out, where=last != 0)
+    out *= 100.0
+    return np.flatnonzero(np.abs(out) >= threshold), out
+
+
+def _open_state(path: str) -> np.ndarray:
+    """Map the baseline block (rows: oi, funding, px, vol), starting fresh if stale.
+
+    Persistence is best-effort: if the file can't be opened, baselines are kept
+    in memory only.
+    """
+    shape = (4, MAX_COINS)
+    try:
+        fresh = (
+            not os.path.exists(path)
+            or os.path.getsize(path) != np.dtype(np.float64).itemsize * shape[0] * shape[1]
+            or time.time() - os.path.getmtime(path) > STATE_MAX_AGE
+        )
+        state = np.memmap(path, dtype=np.float64, mode="w+" if fresh else "r+", shape=shape)
+    except OSError as e:
+        print(f"Error opening state file {path}, keeping baselines in memory: {e}")
+        return np.full(shape, np.nan)
+    if fresh:
+        state.fill(np.nan)
+    return state
+
+
+def _reset_baseline(current: np.ndarray, last: np.ndarray, idx: np.ndarray):
+    """Move baselines of alerted coins and of coins seen for the first time."""
+    last[idx] = current[idx]
+    np.copyto(last, current, where=np.isnan(last))
 
 
 class HyperliquidMonitor:
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
-        self.last_oi: Dict[str, float] = {}
-        self.last_funding: Dict[str, float] = {}
-        self.last_prices: Dict[str, float] = {}
-        self.last_hour_volume: Dict[str, float] = {}
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=3.0),
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16, keepalive_expiry=120.0),
+        )
+        # Per-coin columns indexed like meta["universe"]; NaN baseline = not seen yet
+        self.coins: List[str] = []
+        self._n = 0
+        self._rec = np.zeros(MAX_COINS, dtype=_REC_DT)  # reused every update, no per-coin dicts
+        self._oi, self._funding, self._px, self._vlm = (self._rec[f] for f in ("oi", "fund", "px", "vlm"))
+        # Baselines live in one file-backed block so a restart resumes the window
+        self._state = _open_state(STATE_FILE)
+        self._last_oi, self._last_funding, self._last_px, self._last_vlm = self._state
+        self._change = np.empty((3, MAX_COINS))  # scratch rows for _scan: oi, funding, px
         self.last_check: Dict[str, Any] = {}
+        self._semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+        # /info bodies that never change are serialized once
+        self._meta_body = orjson.dumps({"type": "metaAndAssetCtxs"})
+        self._liq_body = orjson.dumps({"type": "liquidations"})
+        # Detectors only enqueue; _alert_writer owns Telegram delivery
+        self._alerts: asyncio.Queue = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+        self._seen_liqs: Dict[tuple, None] = {}  # insertion-ordered, oldest evicted first
 
     async def close(self):
         await self.client.aclose()
 
-    async def get_all_market_stats(self) -> Dict[str, Any]:
+    async def get_all_market_stats(self) -> np.ndarray:
         """Fetch all perpetual market statistics using metaAndAssetCtxs."""
         try:
-            response = await self.client.post(
-                f"{API_URL}/info",
-                json={"type": "metaAndAssetCtxs"},
-                timeout=30.0
-            )
+            async with self._semaphore:
+                response = await self.client.post(
+                    f"{API_URL}/info",
+                    content=self._meta_body,
+                    headers=_JSON_HEADERS
+                )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             # Parse: [meta, assetContexts] where meta has universe list
             if isinstance(data, list) and len(data) >= 2:
-                meta, asset_ctxs = data[0], data[1]
-                universe = meta.get("universe", [])
-                markets = {}
-                for i, asset in enumerate(asset_ctxs):
-                    coin = universe[i].get("name", f"COIN_{i}") if i < len(universe) else f"COIN_{i}"
-                    mark_px = float(asset.get("markPx", 0))
-                    oi_raw = float(asset.get("openInterest", 0))
-                    markets[coin] = {
-                        "openInterest": oi_raw,
-                        "openInterestUsd": oi_raw * mark_px,  # USD value
-                        "fundingRate": float(asset.get("funding", 0)),
-                        "markPx": mark_px,
-                        "dayNtlVlm": float(asset.get("dayNtlVlm", 0)),  # Already in USD
-                        "prevDayPx": float(asset.get("prevDayPx", 0)),
-                    }
-                return markets
-            return {}
+                return self.parse_asset_ctxs(data[0], data[1])
+            return self._rec[:0]
         except Exception as e:
             print(f"Error fetching market stats: {e}")
-            return {}
+            return self._rec[:0]
+
+    def parse_asset_ctxs(self, meta: Dict[str, Any], asset_ctxs: List[Dict]) -> np.ndarray:
+        """Fill the market records from a meta universe and its asset contexts."""
+        universe = meta.get("universe", [])
+        rec = self._rec
+        n = min(len(asset_ctxs), MAX_COINS)
+        # Hyperliquid sends prices/sizes as decimal strings, so float() stays
+        try:
+            coins = [universe[i]["name"] for i in range(n)]
+            for i, asset in enumerate(asset_ctxs[:n]):
+                mark_px = float(asset["markPx"])
+                oi_raw = float(asset["openInterest"])
+                rec[i] = (oi_raw, oi_raw * mark_px, float(asset["funding"]), mark_px,
+                          float(asset["dayNtlVlm"]), float(asset["prevDayPx"]))
+        except (KeyError, IndexError):
+            # Schema drift, fall back to a defensive parse
+            coins = []
+            for i, asset in enumerate(asset_ctxs[:n]):
+                coins.append(universe[i].get("name", f"COIN_{i}") if i < len(universe) else f"COIN_{i}")
+                mark_px = float(asset.get("markPx", 0))
+                oi_raw = float(asset.get("openInterest", 0))
+                rec[i] = (oi_raw, oi_raw * mark_px, float(asset.get("funding", 0)), mark_px,
+                          float(asset.get("dayNtlVlm", 0)), float(asset.get("prevDayPx", 0)))
+        self.coins = coins
+        self._n = n
+        return rec[:n]
 
     async def get_funding_history(self, coin: str, horizon: int = 24) -> List[Dict]:
         """Get funding history for a coin."""
         try:
-            response = await self.client.post(
-                f"{API_URL}/info",
-                json={
-                    "type": "fundingHistory",
-                    "coin": coin,
-                    "horizon": horizon
-                },
-                timeout=30.0
-            )
+            async with self._semaphore:
+                response = await self.client.post(
+                    f"{API_URL}/info",
+                    content=_funding_history_body(coin, horizon),
+                    headers=_JSON_HEADERS
+                )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             return []
 
     async def get_liquidations(self, coin: Optional[str] = None) -> List[Dict]:
         """Get recent liquidations."""
         try:
-            payload: Dict[str, Any] = {"type": "liquidations"}
-            if coin:
-                payload["coin"] = coin
-            response = await self.client.post(
-                f"{API_URL}/info",
-                json=payload,
-                timeout=30.0
-            )
+            body = orjson.dumps({"type": "liquidations", "coin": coin}) if coin else self._liq_body
+            async with self._semaphore:
+                response = await self.client.post(
+                    f"{API_URL}/info",
+                    content=body,
+                    headers=_JSON_HEADERS
+                )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             return []
 
-    async def send_alert(self, message: str):
-        """Send Telegram alert via OpenClaw CLI."""
-        import subprocess
-        timestamp = datetime.now().isoformat()
+    async def send_alert(self, message: str, timestamp: str):
+        """Send Telegram alert via the Bot API, or the OpenClaw CLI without a bot token."""
         full_message = f"[HL Monitor] {timestamp}\n{message}"
+        if not (TG_BOT_TOKEN and TG_CHAT_ID):
+            await self._send_alert_openclaw(message, full_message)
+            return
         try:
-            subprocess.run([
+            response = await self.client.post(
+                f"{TELEGRAM_API_URL}/bot{TG_BOT_TOKEN}/sendMessage",
+                json={"chat_id": TG_CHAT_ID, "text": full_message}
+            )
+        except Exception as e:
+            # The request URL embeds the bot token, so never print the exception text
+            print(f"[ALERT] {message}")
+            print(f"[ERROR sending via Telegram: {type(e).__name__}]")
+            return
+        if response.is_success:
+            print(f"[SENT] {message}")
+            return
+        try:
+            description = orjson.loads(response.content).get("description", "")
+        except Exception:
+            description = ""
+        print(f"[ALERT] {message}")
+        print(f"[ERROR sending via Telegram: HTTP {response.status_code} {description}]")
+
+    async def _send_alert_openclaw(self, message: str, full_message: str):
+        """Send Telegram alert via OpenClaw CLI without blocking the event loop."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
                 "openclaw", "message", "send",
                 "--channel", "telegram",
-                "--message", full_message
-            ], capture_output=True, timeout=10)
+                "--message", full_message,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                await asyncio.wait_for(proc.communicate(), timeout=OPENCLAW_TIMEOUT)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise
+            if proc.returncode != 0:
+                raise RuntimeError(f"openclaw exited with {proc.returncode}")
             print(f"[SENT] {message}")
         except Exception as e:
             print(f"[ALERT] {message}")
-            print(f"[ERROR sending via OpenClaw: {e}]")
+            print(f"[ERROR sending via OpenClaw: {e!r}]")
+
+    async def send_alerts(self, alerts: List[str]):
+        """Coalesce alerts into as few Telegram messages as fit the size limit."""
+        if not alerts:
+            return
+        timestamp = datetime.now().isoformat()  # one clock read for the whole batch
+        lines = list(alerts)
+        if len(alerts) > ALERT_SUMMARY_MIN:
+            counts = Counter(alert.split(":", 1)[0].split(" ", 1)[-1] for alert in alerts)
+            lines.insert(0, f"{len(alerts)} alerts: " + ", ".join(f"{n} {label}" for label, n in counts.items()))
+        chunk: List[str] = []
+        size = 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > TELEGRAM_MAX_CHARS:
+                await self.send_alert("\n".join(chunk), timestamp)
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        await self.send_alert("\n".join(chunk), timestamp)
+
+    def enqueue_alerts(self, alerts: List[str]):
+        """Hand alerts to the writer, dropping the oldest pending ones when full."""
+        for alert in alerts:
+            if self._alerts.full():
+                self._alerts.get_nowait()
+            self._alerts.put_nowait(alert)
+
+    async def _alert_writer(self):
+        """Deliver queued alerts, batching everything pending into one send."""
+        while True:
+            batch = [await self._alerts.get()]
+            while not self._alerts.empty():
+                batch.append(self._alerts.get_nowait())
+            await self.send_alerts(batch)
 
     def calculate_size_usd(self, position: Dict) -> float:
         """Calculate position size in USD."""
@@ -131,20 +305,16 @@ class HyperliquidMonitor:
         price = position.get("markPx", 0)
         return size * price
 
-    async def check_oi_spikes(self, markets: Dict[str, Any]) -> List[str]:
+    async def check_oi_spikes(self) -> List[str]:
         """Check for OI spikes > threshold."""
         alerts = []
-        for coin, data in markets.items():
-            current_oi = data.get("openInterest", 0)
-            if coin in self.last_oi:
-                change_pct = ((current_oi - self.last_oi[coin]) / self.last_oi[coin]) * 100
-                if abs(change_pct) >= OI_SPIKE_THRESHOLD:
-                    direction = "↑" if change_pct > 0 else "↓"
-                    alerts.append(
-                        f"{direction} OI SPIKE: {coin} OI changed {change_pct:.1f}% "
-                        f"(now: {current_oi:,.0f})"
-                    )
-            self.last_oi[coin] = current_oi
+        current, last = self._oi[:self._n], self._last_oi[:self._n]
+        idx, change = _scan(current, last, OI_SPIKE_THRESHOLD, self._change[0, :self._n])
+        # Locals for the formatting loop: LOAD_FAST instead of attribute/global lookups
+        append, fmt, coins = alerts.append, _OI_TMPL, self.coins
+        for i, pct, value in zip(idx.tolist(), change[idx].tolist(), current[idx].tolist()):
+            append(fmt(dir="↑" if pct > 0 else "↓", coin=coins[i], pct=pct, oi=value))
+        _reset_baseline(current, last, idx)
         return alerts
 
     async def check_whale_positions(self, positions: List[Dict]) -> List[str]:
@@ -153,92 +323,209 @@ class HyperliquidMonitor:
         for pos in positions:
             size_usd = self.calculate_size_usd(pos)
             if size_usd >= WHALE_SIZE_THRESHOLD:
-                coin = pos.get("coin", "UNKNOWN")
-                direction = "↑" if pos.get("szi", 0) > 0 else "↓"
-                alerts.append(
-                    f"🐋 WHALE: {direction} {coin} ${size_usd:,.0f} "
-                    f"(entry: {pos.get('entryPx', 'N/A')})"
-                )
+                alerts.append(_WHALE_TMPL(dir="↑" if pos.get("szi", 0) > 0 else "↓",
+                                          coin=pos.get("coin", "UNKNOWN"), usd=size_usd,
+                                          entry=pos.get("entryPx", "N/A")))
         return alerts
 
-    async def check_funding_spikes(self, markets: Dict[str, Any]) -> List[str]:
+    async def check_funding_spikes(self) -> List[str]:
         """Check for funding rate spikes."""
         alerts = []
-        for coin, data in markets.items():
-            current_funding = data.get("fundingRate", 0)
-            if coin in self.last_funding:
-                prev = self.last_funding[coin]
-                change_pct = ((current_funding - prev) / abs(prev) * 100) if prev != 0 else 0
-                if abs(change_pct) >= FUNDING_SPIKE_THRESHOLD:
-                    direction = "↑" if change_pct > 0 else "↓"
-                    alerts.append(
-                        f"📊 FUNDING SPIKE: {coin} funding {direction} {change_pct:.1f}% "
-                        f"(now: {current_funding:.6f})"
-                    )
-            self.last_funding[coin] = current_funding
+        current, last = self._funding[:self._n], self._last_funding[:self._n]
+        idx, change = _scan(current, last, FUNDING_SPIKE_THRESHOLD, self._change[1, :self._n])
+        append, fmt, coins = alerts.append, _FUNDING_TMPL, self.coins
+        for i, pct, value in zip(idx.tolist(), change[idx].tolist(), current[idx].tolist()):
+            append(fmt(dir="↑" if pct > 0 else "↓", coin=coins[i], pct=pct, funding=value))
+        _reset_baseline(current, last, idx)
         return alerts
 
-    async def check_price_volatility(self, markets: Dict[str, Any]) -> List[str]:
+    async def check_price_volatility(self) -> List[str]:
         """Check for significant price moves."""
         alerts = []
-        for coin, data in markets.items():
-            current_price = data.get("markPx", 0)
-            if coin in self.last_prices:
-                change_pct = ((current_price - self.last_prices[coin]) / self.last_prices[coin]) * 100
-                if abs(change_pct) >= VOLATILITY_SPIKE_THRESHOLD:
-                    direction = "↑" if change_pct > 0 else "↓"
-                    alerts.append(
-                        f"📈 VOLATILITY: {coin} {direction} {change_pct:.2f}% in 1min "
-                        f"(now: ${current_price:,.2f})"
-                    )
-            self.last_prices[coin] = current_price
+        current, last = self._px[:self._n], self._last_px[:self._n]
+        idx, change = _scan(current, last, VOLATILITY_SPIKE_THRESHOLD, self._change[2, :self._n])
+        append, fmt, coins = alerts.append, _VOLATILITY_TMPL, self.coins
+        for i, pct, value in zip(idx.tolist(), change[idx].tolist(), current[idx].tolist()):
+            append(fmt(dir="↑" if pct > 0 else "↓", coin=coins[i], pct=pct, px=value))
+        _reset_baseline(current, last, idx)
         return alerts
 
-    async def run_once(self) -> List[str]:
-        """Run monitoring check once."""
+    async def check_liquidations(self, liquidations: List[Dict]) -> List[str]:
+        """Check for liquidations > threshold."""
+        alerts = []
+        append, fmt, threshold = alerts.append, _LIQUIDATION_TMPL, LIQUIDATION_THRESHOLD
+        seen = self._seen_liqs
+        for liq in liquidations:
+            get = liq.get
+            # Hyperliquid sends sizes/prices as decimal strings
+            price = float(get("price") or 0)
+            size_usd = float(get("size") or 0) * price
+            if size_usd >= threshold:
+                # The REST backfill after a reconnect overlaps what was already pushed
+                key = (get("coin"), get("time"), get("size"), get("price"))
+                if key in seen:
+                    continue
+                seen[key] = None
+                if len(seen) > LIQ_SEEN_SIZE:
+                    del seen[next(iter(seen))]
+                append(fmt(coin=get("coin", "UNKNOWN"), usd=size_usd, px=price))
+        return alerts
+
+    def roll_baselines(self):
+        """Start a new comparison window from the loaded market snapshot."""
+        n = self._n
+        self._last_oi[:n] = self._oi[:n]
+        self._last_funding[:n] = self._funding[:n]
+        self._last_px[:n] = self._px[:n]
+        self._last_vlm[:n] = self._vlm[:n]
+        if isinstance(self._state, np.memmap):
+            self._state.flush()
+
+    async def check_markets(self) -> List[str]:
+        """Run all market checks against the current window's baselines.
+
+        Baselines only move on _window_clock ticks or when a coin alerts, so pushed
+        updates keep the "change per minute" meaning of the thresholds without
+        re-alerting on every frame.
+        """
+        alerts = []
+        alerts.extend(await self.check_oi_spikes())
+        alerts.extend(await self.check_funding_spikes())
+        alerts.extend(await self.check_price_volatility())
+        return alerts
+
+    async def _window_clock(self):
+        """Roll baselines on a fixed POLL_INTERVAL grid of the monotonic clock.
+
+        Deadlines are advanced from the previous deadline rather than from when
+        the last roll finished, so windows stay phase-locked instead of drifting.
+        """
+        next_t = time.monotonic()
+        while True:
+            next_t += POLL_INTERVAL
+            await asyncio.sleep(max(0.0, next_t - time.monotonic()))
+            try:
+                if self._n:
+                    self.roll_baselines()
+            except Exception as e:
+                print(f"Error rolling baselines: {e}")
+
+    async def run_once(self, include_liquidations: bool = False, roll: bool = True) -> List[str]:
+        """Run monitoring check once from a REST snapshot.
+
+        Liquidations normally arrive on the WebSocket feed; pass include_liquidations
+        to also pull them over REST, e.g. to cover the gap after a reconnect. Pass
+        roll=False while _window_clock is running so windows stay on its grid.
+        """
         all_alerts = []
 
-        # Get market data
-        markets = await self.get_all_market_stats()
-        if not markets:
+        # Fetch market data (and liquidations if asked) concurrently
+        async with asyncio.TaskGroup() as tg:
+            markets_task = tg.create_task(self.get_all_market_stats())
+            liq_tasks = [tg.create_task(self.get_liquidations())] if include_liquidations else []
+        markets = markets_task.result()
+        if not len(markets):
             return ["Error: Could not fetch market data"]
 
-        # Run all checks
-        all_alerts.extend(await self.check_oi_spikes(markets))
-        all_alerts.extend(await self.check_funding_spikes(markets))
-        all_alerts.extend(await self.check_price_volatility(markets))
-
-        # Check liquidations
-        liquidations = await self.get_liquidations()
-        for liq in liquidations:
-            size_usd = liq.get("size", 0) * liq.get("price", 0)
-            if size_usd >= LIQUIDATION_THRESHOLD:
-                all_alerts.append(
-                    f"💥 LIQUIDATION: {liq.get('coin', 'UNKNOWN')} "
-                    f"${size_usd:,.0f} @ ${liq.get('price', 0):,.2f}"
-                )
+        # Run all checks; liquidations first so a bad record can't drop market
+        # alerts after their baselines have already moved
+        for task in liq_tasks:
+            all_alerts.extend(await self.check_liquidations(task.result()))
+        all_alerts.extend(await self.check_markets())
+        if roll:
+            self.roll_baselines()
 
         # Send alerts
-        for alert in all_alerts:
-            await self.send_alert(alert)
+        self.enqueue_alerts(all_alerts)
 
         return all_alerts
 
+    async def _heartbeat(self, ws):
+        """Keep the WebSocket alive with application-level pings."""
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            try:
+                await ws.send(json.dumps({"method": "ping"}))
+            except websockets.ConnectionClosed:
+                return  # the receive loop handles the disconnect
+
+    async def _handle_ws_message(self, msg: Dict[str, Any]) -> List[str]:
+        """Route a pushed WebSocket message to the matching checks."""
+        channel = msg.get("channel")
+        data = msg.get("data")
+        if channel == "webData2":
+            if not isinstance(data, dict):
+                return []
+            markets = self.parse_asset_ctxs(data.get("meta") or {}, data.get("assetCtxs") or [])
+            return await self.check_markets() if len(markets) else []
+        if channel == "liquidations":
+            if isinstance(data, dict):
+                data = [data]
+            return await self.check_liquidations(data) if isinstance(data, list) else []
+        if channel == "error":
+            print(f"WebSocket error message: {data}")
+        return []
+
+    async def _ws(self):
+        """Stream market updates and liquidations from the WebSocket feed."""
+        async with websockets.connect(WS_URL, ping_interval=None) as ws:
+            for subscription in (
+                {"type": "webData2", "user": WS_USER},
+                {"type": "liquidations"},
+            ):
+                await ws.send(json.dumps({"method": "subscribe", "subscription": subscription}))
+            print(f"Connected to {WS_URL}")
+            heartbeat = asyncio.create_task(self._heartbeat(ws))
+            try:
+                async for raw in ws:
+                    # A bad frame must not cost the whole session
+                    try:
+                        alerts = await self._handle_ws_message(orjson.loads(raw))
+                    except Exception as e:
+                        print(f"Error handling WebSocket message: {e}")
+                        continue
+                    self.enqueue_alerts(alerts)
+            finally:
+                heartbeat.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await heartbeat
+
     async def run_forever(self):
-        """Run monitoring loop indefinitely."""
-        print(f"Starting Hyperliquid monitor (poll: {POLL_INTERVAL}s)")
+        """Run monitoring from the WebSocket feed indefinitely."""
+        print(f"Starting Hyperliquid monitor (stream: {WS_URL}, window: {POLL_INTERVAL}s)")
         print(f"Thresholds: OI>{OI_SPIKE_THRESHOLD}%, Whale>${WHALE_SIZE_THRESHOLD/1000:.0f}K, "
               f"Funding>{FUNDING_SPIKE_THRESHOLD}%, Liq>${LIQUIDATION_THRESHOLD/1000:.0f}K")
+        if bool(TG_BOT_TOKEN) != bool(TG_CHAT_ID):
+            print("Warning: set both TG_BOT_TOKEN and TG_CHAT_ID to use the Telegram Bot API; "
+                  "falling back to the OpenClaw CLI")
+        # Cold-start snapshot sets the first window before _window_clock takes over
+        await self._snapshot()
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._alert_writer())
+            tg.create_task(self._window_clock())
+            tg.create_task(self._stream())
+
+    async def _snapshot(self, include_liquidations: bool = False, roll: bool = True):
+        """Run a REST snapshot check and log its outcome."""
+        try:
+            alerts = await self.run_once(include_liquidations=include_liquidations, roll=roll)
+            if alerts:
+                print(f"  Generated {len(alerts)} alerts")
+            else:
+                print(f"  [{datetime.now().isoformat()}] No alerts")
+        except Exception as e:
+            print(f"Error in snapshot: {e}")
+
+    async def _stream(self):
+        """Run WebSocket sessions forever, with a REST snapshot after every disconnect."""
         while True:
             try:
-                alerts = await self.run_once()
-                if alerts:
-                    print(f"  Generated {len(alerts)} alerts")
-                else:
-                    print(f"  [{datetime.now().isoformat()}] No alerts")
+                await self._ws()
             except Exception as e:
-                print(f"Error in monitoring loop: {e}")
-            await asyncio.sleep(POLL_INTERVAL)
+                print(f"Error in WebSocket stream: {e}")
+            await asyncio.sleep(WS_RECONNECT_DELAY)
+            # _window_clock owns the windows by now, so the snapshot must not roll them
+            await self._snapshot(include_liquidations=True, roll=False)
 
 
 async def main():